@@ -0,0 +1,30 @@
+# cython: language_level=3
+"""Versão compilada de app._flatten_into_py (mesma assinatura e resultado).
+
+Gerada no build (``cythonize -i _flatten.pyx``); sem a extensão, o app usa
+a versão em Python puro.
+"""
+
+
+def flatten_into(dict columns, dict deal, dict fields):
+    """Acrescenta um deal às listas por coluna de `columns`."""
+    cdef str col
+    cdef list paths
+    cdef tuple path
+    cdef object value
+    cdef object key
+    for col, paths in fields.items():
+        value = None
+        for path in paths:
+            value = deal
+            for key in path:
+                if type(value) is not dict:
+                    value = None
+                    break
+                value = (<dict>value).get(key)
+            # Objetos/listas aninhados não viram coluna
+            if type(value) is dict or type(value) is list:
+                value = None
+            if value is not None:
+                break
+        (<list>columns[col]).append(value)
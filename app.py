@@ -1,118 +1,440 @@
 import os
+import math
+import operator
+import re
+import asyncio
+import threading
+import time
+import httpx
+import ijson
+import orjson
+import tempfile
 import pandas as pd
-import requests
+import polars as pl
+from io import BytesIO
 from urllib.parse import quote
 from datetime import datetime
 from dash import Dash, html, dcc, dash_table
-from dash.dependencies import Input, Output
+from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
+from flask.json.provider import JSONProvider
+from flask_caching import Cache
 import dash_auth
-import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
 
 # ========= Config =========
 TOKEN = os.getenv("RDSTATION_API_TOKEN")
 BASE_URL = os.getenv("RDSTATION_BASE_URL", "https://crm.rdstation.com/api/v1").rstrip("/")
 USERNAME = os.getenv("APP_USER", "admin")
 PASSWORD = os.getenv("APP_PASS", "admin123")
+PAGE_LIMIT = int(os.getenv("RDSTATION_PAGE_LIMIT", "200"))
+MAX_CONCURRENCY = int(os.getenv("RDSTATION_MAX_CONCURRENCY", "10"))
+PAGE_SIZE = 15
+CACHE_TIMEOUT = int(os.getenv("CACHE_TIMEOUT", "300"))
+# As entradas vivem mais que a janela: quem expira é a chave (ver _data_key)
+CACHE_ENTRY_TIMEOUT = 2 * CACHE_TIMEOUT
+# Frames já decodificados mantidos por processo (chave atual e a da janela anterior)
+FRAME_CACHE_SIZE = 2
+REDIS_URL = os.getenv("REDIS_URL")
+TIMEZONE = os.getenv("APP_TIMEZONE", "America/Sao_Paulo")
 
 if not TOKEN:
     raise RuntimeError("RDSTATION_API_TOKEN não definido nas variáveis de ambiente.")
 
+# ========= App =========
+class ORJSONProvider(JSONProvider):
+    """Provider JSON do Flask baseado em orjson (mais rápido, datetime nativo)."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+# Saídas dos callbacks e figuras passam pelo encoder do Plotly
+pio.json.config.default_engine = "orjson"
+
+# compress=True: respostas (layout e callbacks) saem com gzip via Flask-Compress
+app = Dash(__name__, compress=True)
+server = app.server  # para Render/Heroku
+server.json = ORJSONProvider(server)
+
+auth = dash_auth.BasicAuth(app, {USERNAME: PASSWORD})
+
+# Cache compartilhado entre workers: Redis se houver REDIS_URL, senão disco local
+if REDIS_URL:
+    cache_config = {"CACHE_TYPE": "RedisCache", "CACHE_REDIS_URL": REDIS_URL}
+else:
+    cache_config = {
+        "CACHE_TYPE": "FileSystemCache",
+        "CACHE_DIR": os.getenv("CACHE_DIR", os.path.join(tempfile.gettempdir(), "rd-crm-cache")),
+    }
+cache_config["CACHE_DEFAULT_TIMEOUT"] = CACHE_ENTRY_TIMEOUT
+cache = Cache(server, config=cache_config)
+
 # ========= HTTP =========
-def _get(url: str) -> dict:
+# Onde ficam os deals no JSON de cada página, na notação de prefixos do ijson
+DEAL_PREFIXES = ("deals.item", "items.item", "item")
+PAGE_META_KEYS = ("total", "has_more", "next_page")
+
+class _AsyncBytesReader:
+    """Expõe o corpo em streaming do httpx com o read() assíncrono que o ijson espera."""
+
+    def __init__(self, response: httpx.Response):
+        self._chunks = response.aiter_bytes()
+
+    async def read(self, size: int = -1) -> bytes:
+        # O ijson chama read(0) só para descobrir o tipo (bytes/str)
+        if size == 0:
+            return b""
+        # b"" sinaliza fim do corpo para o ijson, então pedaços vazios são pulados
+        async for chunk in self._chunks:
+            if chunk:
+                return chunk
+        return b""
+
+async def _aget_page(client: httpx.AsyncClient, sem: asyncio.BoundedSemaphore, url: str) -> tuple:
+    """Busca uma página em streaming, achatando deal a deal conforme chega.
+
+    Nunca monta a árvore JSON da página inteira: devolve só os metadados
+    (total/has_more/next_page), as listas por coluna e o nº de deals.
+    """
+    meta = {}
+    columns = _new_columns()
+    count = 0
+    builder = None
+    deal_prefix = None
+    async with sem:
+        async with client.stream("GET", url) as r:
+            r.raise_for_status()
+            async for prefix, event, value in ijson.parse_async(_AsyncBytesReader(r), use_float=True):
+                if builder is not None:
+                    builder.event(event, value)
+                    if prefix == deal_prefix and event == "end_map":
+                        _flatten_into(columns, builder.value, DEAL_FIELDS)
+                        count += 1
+                        builder = None
+                elif event == "start_map" and prefix in DEAL_PREFIXES:
+                    deal_prefix = prefix
+                    builder = ijson.ObjectBuilder()
+                    builder.event(event, value)
+                elif prefix in PAGE_META_KEYS:
+                    meta[prefix] = value
+    return meta, columns, count
+
+async def _afetch_all_deals(transport: httpx.AsyncBaseTransport = None) -> dict:
     headers = {"Authorization": f"Bearer {TOKEN}", "accept": "application/json"}
-    r = requests.get(url, headers=headers, timeout=30)
-    r.raise_for_status()
-    return r.json()
-
-def fetch_all_deals() -> list:
-    """Busca todas as páginas de /deals (esperando chaves deals/has_more/next_page)."""
-    items = []
-    next_page = None
-    while True:
-        url = f"{BASE_URL}/deals"
-        if next_page:
-            url += f"?next_page={quote(next_page)}"
-        data = _get(url)
-
-        deals_page = data.get("deals") or data.get("items") or data
-        if isinstance(deals_page, dict):
-            # caso a API retorne um objeto, tente achar uma lista dentro
-            for v in deals_page.values():
-                if isinstance(v, list):
-                    deals_page = v
-                    break
-
-        if not isinstance(deals_page, list):
-            deals_page = []
-
-        items.extend(deals_page)
-
-        has_more = bool(data.get("has_more"))
-        next_page = data.get("next_page")
-        if not has_more or not next_page:
-            break
-    return items
-
-def load_data() -> pd.DataFrame:
-    deals = fetch_all_deals()
-    if not deals:
+    limits = httpx.Limits(max_connections=16)
+    sem = asyncio.BoundedSemaphore(MAX_CONCURRENCY)
+    # HTTP/2: as páginas concorrentes compartilham uma única conexão TLS
+    # (transport só é passado nos testes, com httpx.MockTransport)
+    async with httpx.AsyncClient(
+        http2=True, headers=headers, limits=limits, timeout=30, transport=transport
+    ) as client:
+        url = f"{BASE_URL}/deals?page=1&limit={PAGE_LIMIT}"
+        meta, columns, count = await _aget_page(client, sem, url)
+
+        # Com "total" conhecido, as páginas 2..N são buscadas em paralelo
+        total = meta.get("total")
+        if isinstance(total, int) and count and total > count:
+            n_pages = math.ceil(total / count)
+            pages = await asyncio.gather(*[
+                _aget_page(client, sem, f"{BASE_URL}/deals?page={i}&limit={count}")
+                for i in range(2, n_pages + 1)
+            ])
+            for _, page_columns, _ in pages:
+                _extend_columns(columns, page_columns)
+            return columns
+
+        # Sem "total", só resta seguir o cursor next_page (sequencial por natureza)
+        while meta.get("has_more") and meta.get("next_page"):
+            url = f"{BASE_URL}/deals?next_page={quote(meta['next_page'])}"
+            meta, page_columns, _ = await _aget_page(client, sem, url)
+            _extend_columns(columns, page_columns)
+    return columns
+
+def fetch_all_deals() -> dict:
+    """Busca todas as páginas de /deals (esperando chaves deals/total ou has_more/next_page).
+
+    Retorna os deals já achatados, no formato {coluna: lista}.
+    """
+    return asyncio.run(_afetch_all_deals())
+
+# ========= Normalização =========
+# Coluna amigável -> caminhos candidatos no deal (vale o primeiro preenchido).
+# Ajuste os caminhos se sua API usar outras chaves.
+DEAL_FIELDS = {
+    "id": [("id",), ("_id",)],
+    "nome": [("name",)],
+    "status": [("status",)],
+    "etapa": [("stage", "name"), ("deal_stage", "name"), ("stage",)],
+    "valor": [("amount",), ("value",), ("amount_total",)],
+    "closed_at": [("closed_at",)],
+    "prediction_date": [("prediction_date",)],
+    "created_at": [("created_at",)],
+}
+# Colunas de data: com hora (e fuso) ou só o dia
+TIMESTAMP_COLUMNS = ("closed_at", "created_at")
+DATE_COLUMNS = ("prediction_date",)
+
+def _dig(deal: dict, path: tuple):
+    value = deal
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    # Objetos/listas aninhados não viram coluna
+    if isinstance(value, (dict, list)):
+        return None
+    return value
+
+def _flatten_into_py(columns: dict, deal: dict, fields: dict) -> None:
+    """Acrescenta um deal às listas por coluna de `columns`."""
+    for col, paths in fields.items():
+        value = None
+        for path in paths:
+            value = _dig(deal, path)
+            if value is not None:
+                break
+        columns[col].append(value)
+
+try:
+    # Mesmo laço compilado com Cython (_flatten.pyx, gerado no buildCommand); sem a extensão, fica o Python puro
+    from _flatten import flatten_into as _flatten_into
+except ImportError:
+    _flatten_into = _flatten_into_py
+
+def _new_columns() -> dict:
+    return {col: [] for col in DEAL_FIELDS}
+
+def _extend_columns(columns: dict, other: dict) -> None:
+    for col, values in other.items():
+        columns[col].extend(values)
+
+def _data_key(version: int) -> tuple:
+    """Chave de cache de uma versão dos dados: (versão, janela de CACHE_TIMEOUT).
+
+    Parquet, resumo e views usam a mesma chave, então expiram juntos na
+    virada da janela, em vez de cada camada vencer num momento diferente.
+    A chave é calculada uma vez (preload ou recarga) e vai ao browser em
+    store-version; gráficos e tabela recebem a mesma chave de lá.
+    """
+    return (version or 0, int(time.time() // CACHE_TIMEOUT))
+
+_fetch_lock = threading.Lock()
+
+def _load_parquet(key: tuple) -> bytes:
+    """Deals buscados e normalizados, serializados em parquet, para a chave `key`.
+
+    O lock garante que, num cache miss, só um chamador busca a API; os demais
+    esperam e leem o resultado do cache.
+    """
+    cache_key = f"parquet:{key}"
+    data = cache.get(cache_key)
+    if data is None:
+        with _fetch_lock:
+            data = cache.get(cache_key)
+            if data is None:
+                buf = BytesIO()
+                _build_frame().to_parquet(buf)
+                data = buf.getvalue()
+                cache.set(cache_key, data)
+    return data
+
+def _build_frame() -> pd.DataFrame:
+    columns = fetch_all_deals()
+    if not any(columns.values()):
         return pd.DataFrame()
 
-    # Normaliza campos comuns
-    df = pd.json_normalize(deals, sep="__")
-
-    # Tenta inferir algumas colunas padrão
-    # Ajuste os nomes se sua API usar outras chaves.
-    rename_map = {
-        "id": "id",
-        "name": "nome",
-        "status": "status",
-        "stage": "etapa",
-        "amount": "valor",
-        "value": "valor",                       # fallback
-        "closed_at": "closed_at",
-        "prediction_date": "prediction_date",
-        "created_at": "created_at",
-    }
-    for k, v in list(rename_map.items()):
-        if k not in df.columns:
-            # procura por variações (ex: deal.amount, deal.value etc)
-            alt = [c for c in df.columns if c.endswith(k) or c.split("__")[-1] == k]
-            if alt:
-                rename_map[alt[0]] = v
-                rename_map.pop(k, None)
-
-    df = df.rename(columns=rename_map)
-
-    # Conversões de data (se existirem)
-    for col in ["closed_at", "prediction_date", "created_at"]:
+    # Colunas sem nenhum valor são descartadas
+    df = pd.DataFrame.from_dict({col: values for col, values in columns.items() if any(v is not None for v in values)})
+
+    # Conversões de data (se existirem): parser ISO 8601 direto, sem adivinhar formato.
+    # Datas com hora vêm com fuso e viram hora local de APP_TIMEZONE (numa passada por coluna)
+    for col in TIMESTAMP_COLUMNS:
+        if col in df.columns:
+            dates = pd.to_datetime(df[col], errors="coerce", utc=True, format="ISO8601")
+            df[col] = dates.dt.tz_convert(TIMEZONE).dt.tz_localize(None)
+    # Datas sem hora já são do dia local: ficam como vieram
+    for col in DATE_COLUMNS:
         if col in df.columns:
-            df[col] = pd.to_datetime(df[col], errors="coerce").dt.tz_localize(None)
+            df[col] = pd.to_datetime(df[col], errors="coerce", format="ISO8601")
+
+    # Mês do gráfico mensal como inteiro (ano*12 + mês-1), calculado uma vez por carga
+    date_col = _date_col(df)
+    if date_col:
+        dates = df[date_col]
+        df["mes"] = (dates.dt.year * 12 + dates.dt.month - 1).astype("Int16")
 
     # Valor numérico
     if "valor" in df.columns:
         df["valor"] = pd.to_numeric(df["valor"], errors="coerce")
 
-    # Colunas amigáveis pro frontend
-    keep_cols = [c for c in ["id", "nome", "status", "etapa", "valor", "closed_at", "prediction_date", "created_at"] if c in df.columns]
-    if keep_cols:
-        df_display = df[keep_cols].copy()
-    else:
-        df_display = df.copy()
+    # Colunas de baixa cardinalidade como Categorical (filtros/groupby mais baratos)
+    for col in ("status", "etapa"):
+        if col in df.columns:
+            df[col] = df[col].astype("category")
 
-    return df_display
+    return df
 
-# ========= App =========
-app = Dash(__name__)
-server = app.server  # para Render/Heroku
+def _date_col(df):
+    """Coluna usada no gráfico mensal (created_at ou closed_at)."""
+    return "created_at" if "created_at" in df.columns else ("closed_at" if "closed_at" in df.columns else None)
 
-auth = dash_auth.BasicAuth(app, {USERNAME: PASSWORD})
+_frames = {}
+_frames_lock = threading.Lock()
 
-def build_layout(df: pd.DataFrame):
-    # Opções de filtros
-    etapas = sorted(df["etapa"].dropna().unique()) if "etapa" in df.columns else []
-    status_opts = sorted(df["status"].dropna().unique()) if "status" in df.columns else []
+def _load_polars(key: tuple) -> pl.DataFrame:
+    """Frame dos deals, lido do parquet em cache direto para Polars.
 
+    Gráficos e tabela trabalham sobre ele; pandas só aparece na saída
+    para a DataTable (ver _records). O frame decodificado fica em memória
+    por chave, então paginar, ordenar e filtrar não relê o parquet.
+    """
+    df = _frames.get(key)
+    if df is None:
+        df = pl.read_parquet(BytesIO(_load_parquet(key)))
+        with _frames_lock:
+            _frames[key] = df
+            while len(_frames) > FRAME_CACHE_SIZE:
+                _frames.pop(next(iter(_frames)))
+    return df
+
+def _count_by_etapa(df: pl.DataFrame) -> dict:
+    return dict(sorted(df.drop_nulls("etapa").group_by("etapa").len().iter_rows()))
+
+def _count_by_month(df: pl.DataFrame) -> dict:
+    # Só os rótulos do resultado agrupado (poucos meses) viram texto
+    counts = df.drop_nulls("mes").group_by("mes").len().sort("mes")
+    return {f"{m // 12}-{m % 12 + 1:02d}": n for m, n in counts.iter_rows()}
+
+def _summary(df: pl.DataFrame) -> pl.DataFrame:
+    """Resumo etapa × status (qtde e soma de valor), base dos KPIs."""
+    keys = [c for c in ("etapa", "status") if c in df.columns]
+    aggs = [pl.len().alias("qtde")]
+    if "valor" in df.columns:
+        aggs += [pl.col("valor").sum().alias("soma"), pl.col("valor").count().alias("com_valor")]
+    return df.group_by(keys).agg(aggs) if keys else df.select(aggs)
+
+@cache.memoize()
+def _load_summary(key: tuple) -> pl.DataFrame:
+    return _summary(_load_polars(key))
+
+def _kpis(summary: pl.DataFrame) -> list:
+    # Soma sobre no máximo |etapa|×|status| linhas, não sobre o frame inteiro
+    kpis = [("Deals", f"{summary['qtde'].sum()}")]
+    if "soma" in summary.columns and summary["com_valor"].sum() > 0:
+        kpis.append(("Soma Valor", f"{summary['soma'].sum():,.2f}"))
+    return kpis
+
+def _records(df: pd.DataFrame) -> list:
+    """Linhas para a DataTable, com datas em texto ISO."""
+    out = df.drop(columns="mes", errors="ignore")
+    for col in out.select_dtypes("datetime").columns:
+        out[col] = out[col].dt.strftime("%Y-%m-%dT%H:%M:%S")
+    return out.to_dict("records")
+
+def _filter_conditions(df: pl.DataFrame, etapas_key: tuple, status_key: tuple) -> list:
+    """Condições dos dropdowns de etapa/status, comuns a gráficos e tabela."""
+    conditions = []
+    if etapas_key and "etapa" in df.columns:
+        conditions.append(pl.col("etapa").is_in(etapas_key))
+    if status_key and "status" in df.columns:
+        conditions.append(pl.col("status").is_in(status_key))
+    return conditions
+
+# Operadores do filter_query da DataTable: a tabela manda símbolos (">=", "=")
+# e a sintaxe escrita aceita palavras ("ge", "eq"); os dois valem o mesmo
+FILTER_OPERATORS = {
+    ">=": operator.ge, "ge": operator.ge,
+    "<=": operator.le, "le": operator.le,
+    "<": operator.lt, "lt": operator.lt,
+    ">": operator.gt, "gt": operator.gt,
+    "!=": operator.ne, "ne": operator.ne,
+    "=": operator.eq, "eq": operator.eq,
+}
+
+# "{coluna} [s|i]op valor": o prefixo s/i (sensível/insensível a maiúsculas) vem
+# colado ao operador, ex. "{nome} scontains 4", "{valor} s> 150"
+_FILTER_PART = re.compile(
+    r"^\s*\{(?P<col>[^}]*)\}\s+(?P<case>[si]?)"
+    r"(?P<op>>=|<=|!=|<|>|=|ge|le|ne|eq|lt|gt|contains|datestartswith)\s+(?P<value>.+?)\s*$"
+)
+
+def _split_filter_part(filter_part: str):
+    """Quebra um trecho do filter_query em (coluna, op, ignora_maiúsculas, valor em texto)."""
+    match = _FILTER_PART.match(filter_part)
+    if not match:
+        return None, None, False, None
+    value = match["value"]
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in ("'", '"', "`"):
+        value = value[1:-1].replace("\\" + value[0], value[0])
+    return match["col"], match["op"], match["case"] == "i", value
+
+def _as_text(df: pl.DataFrame, col: str) -> pl.Expr:
+    # Datas no mesmo formato mostrado na tabela (ver _records)
+    if df.schema[col].is_temporal():
+        return pl.col(col).dt.strftime("%Y-%m-%dT%H:%M:%S")
+    return pl.col(col).cast(pl.String)
+
+def _filter_query_conditions(df: pl.DataFrame, filter_query: str) -> list:
+    """Condições Polars do filter_query da DataTable (um trecho por condição)."""
+    conditions = []
+    for part in (filter_query or "").split(" && "):
+        col, op, ignore_case, value = _split_filter_part(part)
+        if col not in df.columns:
+            continue
+        dtype = df.schema[col]
+        try:
+            if op in FILTER_OPERATORS:
+                # Só as comparações convertem o valor (número ou data, conforme a coluna)
+                expr = pl.col(col)
+                if dtype.is_numeric():
+                    value = float(value)
+                elif dtype.is_temporal():
+                    value = datetime.fromisoformat(value)
+                else:
+                    expr = expr.cast(pl.String)
+                    if ignore_case:
+                        expr, value = expr.str.to_lowercase(), value.lower()
+                conditions.append(FILTER_OPERATORS[op](expr, value))
+            elif op == "contains":
+                text = _as_text(df, col)
+                if ignore_case:
+                    text, value = text.str.to_lowercase(), value.lower()
+                conditions.append(text.str.contains(value, literal=True))
+            elif op == "datestartswith":
+                conditions.append(_as_text(df, col).str.starts_with(value))
+        except (TypeError, ValueError):
+            # Comparação inválida para o tipo da coluna: ignora o trecho
+            continue
+    return conditions
+
+def _sort_expr(df: pl.DataFrame, col: str) -> pl.Expr:
+    # Categorias ordenam pelo texto, como as opções dos filtros
+    if df.schema[col] == pl.Categorical:
+        return pl.col(col).cast(pl.String)
+    return pl.col(col)
+
+def _bar(counts: dict, x: str, title: str) -> go.Figure:
+    """Gráfico de barras direto dos contadores já agregados (sem Plotly Express)."""
+    layout = {"title": {"text": title}, "xaxis": {"title": {"text": x}}, "yaxis": {"title": {"text": "qtde"}}}
+    if not counts:
+        return go.Figure(layout=layout)
+    return go.Figure(go.Bar(x=list(counts), y=list(counts.values())), layout=layout)
+
+# ========= Layout =========
+def _options(df: pl.DataFrame, col: str) -> list:
+    # Opções de filtros, em ordem alfabética
+    values = df[col].drop_nulls().unique().cast(pl.String).sort().to_list() if col in df.columns else []
+    return [{"label": v, "value": v} for v in values]
+
+def _table_columns(df: pl.DataFrame) -> list:
+    return [{"name": c, "id": c, "hideable": True} for c in df.columns if c != "mes"]
+
+def build_layout(df: pl.DataFrame, key: tuple = None):
+    loading = key is None
     return html.Div(
         style={"padding": "24px", "fontFamily": "Arial, sans-serif"},
         children=[
@@ -122,14 +444,14 @@ def build_layout(df: pd.DataFrame):
                 children=[
                     dcc.Dropdown(
                         id="filtro-etapa",
-                        options=[{"label": e, "value": e} for e in etapas],
+                        options=_options(df, "etapa"),
                         placeholder="Filtrar por etapa",
                         multi=True,
                         style={"minWidth": "260px"},
                     ),
                     dcc.Dropdown(
                         id="filtro-status",
-                        options=[{"label": s, "value": s} for s in status_opts],
+                        options=_options(df, "status"),
                         placeholder="Filtrar por status",
                         multi=True,
                         style={"minWidth": "260px"},
@@ -137,78 +459,224 @@ def build_layout(df: pd.DataFrame):
                     html.Button("Recarregar dados", id="btn-reload"),
                 ],
             ),
+            html.Div(id="status-carga", children="Carregando dados do RD Station..." if loading else None),
+            dcc.Interval(id="aguarda-dados", interval=1000, disabled=not loading),
             html.Div(id="kpis", style={"display": "flex", "gap": "24px", "marginBottom": "12px"}),
             dcc.Graph(id="grafico-etapas"),
             dcc.Graph(id="grafico-mensal"),
+            # Paginação, filtro e ordenação no servidor: só a página atual vai ao browser
             dash_table.DataTable(
                 id="tabela",
-                columns=[{"name": c, "id": c} for c in df.columns],
-                data=df.to_dict("records"),
-                page_size=15,
-                sort_action="native",
-                filter_action="native",
+                columns=_table_columns(df),
+                hidden_columns=[],
+                data=[],
+                page_current=0,
+                page_size=PAGE_SIZE,
+                page_action="custom",
+                sort_action="custom",
+                sort_mode="multi",
+                sort_by=[],
+                filter_action="custom",
+                filter_query="",
+                fixed_rows={"headers": True},
                 style_table={"overflowX": "auto"},
                 style_cell={"fontSize": 12, "padding": "6px"},
             ),
-            dcc.Store(id="store-data", data=df.to_dict("records")),
+            # Chave dos dados (ver _data_key); vazia até a carga inicial terminar
+            dcc.Store(id="store-version", data=list(key) if key else None, storage_type="memory"),
         ],
     )
 
-# Carrega uma vez no start
-_df = load_data()
-app.layout = build_layout(_df)
+# Carga inicial em segundo plano: o import (e o boot do worker) não espera a API
+_preloaded = {}
+_preload_done = threading.Event()
+_preload_lock = threading.Lock()
+_preload_running = False
+
+def _preload():
+    global _preload_running
+    try:
+        key = _data_key(0)
+        df = _load_polars(key)
+        _unfiltered_views(key)
+        _preloaded.update(df=df, key=key)
+    finally:
+        with _preload_lock:
+            _preload_running = False
+        _preload_done.set()
+
+def _start_preload():
+    """Dispara a carga em segundo plano, no máximo uma por vez por processo.
+
+    Sob `gunicorn --preload` o import acontece no master e threads não
+    sobrevivem ao fork, por isso a carga começa no primeiro request de cada worker.
+    """
+    global _preload_running
+    with _preload_lock:
+        if not _preload_running:
+            _preload_running = True
+            threading.Thread(target=_preload, daemon=True).start()
+
+@server.before_request
+def _preload_on_first_request():
+    if not _preload_done.is_set():
+        _start_preload()
+
+def serve_layout():
+    # Chamado a cada acesso: enquanto a carga não termina, serve o painel vazio
+    key = _preloaded.get("key")
+    if key is not None and key != _data_key(0):
+        # A janela virou: recarrega em segundo plano e, até lá, segue na chave anterior
+        _start_preload()
+    return build_layout(_preloaded.get("df", pl.DataFrame()), key)
+
+app.layout = serve_layout
 
 # ========= Callbacks =========
 @app.callback(
-    Output("store-data", "data"),
-    [Input("btn-reload", "n_clicks")],
+    [
+        Output("aguarda-dados", "disabled"),
+        Output("status-carga", "children"),
+        Output("filtro-etapa", "options"),
+        Output("filtro-status", "options"),
+        Output("tabela", "columns"),
+        Output("store-version", "data", allow_duplicate=True),
+    ],
+    [Input("aguarda-dados", "n_intervals")],
+    [State("store-version", "data")],
     prevent_initial_call=True,
 )
-def reload_data(n):
-    df = load_data()
-    return df.to_dict("records")
+def check_preload(n, key):
+    if not _preload_done.is_set():
+        raise PreventUpdate
+    df = _preloaded.get("df")
+    if df is None:
+        return True, 'Falha ao carregar os dados. Use "Recarregar dados".', [], [], [], key
+    # Enviar a chave da carga dispara gráficos e tabela, agora com os dados
+    return True, None, _options(df, "etapa"), _options(df, "status"), _table_columns(df), list(_preloaded["key"])
 
 @app.callback(
-    [Output("tabela", "data"), Output("grafico-etapas", "figure"), Output("grafico-mensal", "figure"), Output("kpis", "children")],
-    [Input("store-data", "data"), Input("filtro-etapa", "value"), Input("filtro-status", "value")],
+    Output("store-version", "data"),
+    [Input("btn-reload", "n_clicks")],
+    [State("store-version", "data")],
+    prevent_initial_call=True,
 )
-def update_views(data, etapas_sel, status_sel):
-    df = pd.DataFrame(data or [])
-
-    # Filtros
-    if etapas_sel and "etapa" in df.columns:
-        df = df[df["etapa"].isin(etapas_sel)]
-    if status_sel and "status" in df.columns:
-        df = df[df["status"].isin(status_sel)]
-
-    # KPIs
-    kpi_children = []
-    total_deals = len(df)
-    kpi_children.append(html.Div([html.H4("Deals"), html.H3(f"{total_deals}")]))
-    if "valor" in df.columns and not df["valor"].isna().all():
-        kpi_children.append(html.Div([html.H4("Soma Valor"), html.H3(f"{df['valor'].sum():,.2f}")]))
+def reload_data(n, key):
+    key = _data_key((key[0] if key else 0) + 1)
+    # Descarta uma entrada antiga desta chave para garantir dados frescos
+    cache.delete(f"parquet:{key}")
+    with _frames_lock:
+        _frames.pop(key, None)
+    cache.delete_memoized(_load_summary, key)
+    cache.delete_memoized(_unfiltered_views, key)
+    cache.delete_memoized(_compute_views)
+    # Já deixa pronta a visão sem filtro, que é a primeira a ser pedida
+    _unfiltered_views(key)
+    return list(key)
+
+def _views(df: pl.DataFrame, summary: pl.DataFrame) -> tuple:
+    """Figuras (já em JSON) e KPIs de um frame e do seu resumo, já filtrados."""
+    kpis = _kpis(summary)
 
     # Gráfico por etapas
     if "etapa" in df.columns:
-        fig1 = px.bar(df.groupby("etapa").size().reset_index(name="qtde"), x="etapa", y="qtde", title="Deals por Etapa")
+        fig1 = _bar(_count_by_etapa(df), "etapa", "Deals por Etapa")
     else:
-        fig1 = px.bar(title="Deals por Etapa (coluna 'etapa' não encontrada)")
+        fig1 = _bar({}, "etapa", "Deals por Etapa (coluna 'etapa' não encontrada)")
 
     # Gráfico mensal (por created_at ou closed_at)
-    date_col = "created_at" if "created_at" in df.columns else ("closed_at" if "closed_at" in df.columns else None)
+    date_col = _date_col(df)
     if date_col:
-        dff = df.dropna(subset=[date_col]).copy()
-        if not dff.empty:
-            dff["mes"] = dff[date_col].dt.to_period("M").astype(str)
-            fig2 = px.bar(dff.groupby("mes").size().reset_index(name="qtde"), x="mes", y="qtde", title=f"Deals por Mês ({date_col})")
-        else:
-            fig2 = px.bar(title=f"Deals por Mês ({date_col})")
+        fig2 = _bar(_count_by_month(df), "mes", f"Deals por Mês ({date_col})")
     else:
-        fig2 = px.bar(title="Deals por Mês (sem colunas de data)")
+        fig2 = _bar({}, "mes", "Deals por Mês (sem colunas de data)")
+
+    return fig1.to_json(), fig2.to_json(), kpis
+
+@cache.memoize()
+def _unfiltered_views(key: tuple) -> tuple:
+    """Views sem filtro, montadas uma vez por chave dos dados."""
+    return _views(_load_polars(key), _load_summary(key))
+
+@cache.memoize()
+def _compute_views(key: tuple, etapas_key: tuple, status_key: tuple) -> tuple:
+    """Views para uma combinação de filtros.
+
+    Memoizado por (chave dos dados, filtros): voltar a uma combinação já
+    vista não refaz o trabalho de Polars nem de plotly.
+    """
+    df = _load_polars(key)
+    summary = _load_summary(key)
+
+    # Filtros (plano lazy do Polars, materializado uma vez para os agregados)
+    conditions = _filter_conditions(df, etapas_key, status_key)
+    if conditions:
+        df = df.lazy().filter(*conditions).collect()
+        summary = summary.filter(*conditions)
+
+    return _views(df, summary)
+
+@app.callback(
+    [Output("grafico-etapas", "figure"), Output("grafico-mensal", "figure"), Output("kpis", "children")],
+    [Input("store-version", "data"), Input("filtro-etapa", "value"), Input("filtro-status", "value")],
+)
+def update_views(key, etapas_sel, status_sel):
+    if not key:
+        # Carga inicial em andamento: fica o placeholder; check_preload envia a chave
+        raise PreventUpdate
+    key = tuple(key)
+    # Sem filtros (primeira carga, "limpar filtros"): nada de frame nem groupby
+    if not etapas_sel and not status_sel:
+        fig1_json, fig2_json, kpis = _unfiltered_views(key)
+    else:
+        fig1_json, fig2_json, kpis = _compute_views(
+            key, tuple(sorted(etapas_sel or ())), tuple(sorted(status_sel or ()))
+        )
+    kpi_children = [html.Div([html.H4(label), html.H3(value)]) for label, value in kpis]
+    return orjson.loads(fig1_json), orjson.loads(fig2_json), kpi_children
+
+@app.callback(
+    [Output("tabela", "data"), Output("tabela", "page_count"), Output("tabela", "page_current")],
+    [
+        Input("store-version", "data"),
+        Input("filtro-etapa", "value"),
+        Input("filtro-status", "value"),
+        Input("tabela", "page_current"),
+        Input("tabela", "page_size"),
+        Input("tabela", "sort_by"),
+        Input("tabela", "filter_query"),
+        Input("tabela", "hidden_columns"),
+    ],
+)
+def update_table(key, etapas_sel, status_sel, page_current, page_size, sort_by, filter_query, hidden_columns):
+    if not key:
+        # Carga inicial em andamento: fica o placeholder; check_preload envia a chave
+        raise PreventUpdate
+    df = _load_polars(tuple(key))
+    # Dropdowns e filter_query num único filtro do Polars
+    conditions = _filter_conditions(df, tuple(etapas_sel or ()), tuple(status_sel or ()))
+    conditions += _filter_query_conditions(df, filter_query)
+    if conditions:
+        df = df.filter(*conditions)
+
+    sort_by = [s for s in (sort_by or []) if s["column_id"] in df.columns]
+    if sort_by:
+        df = df.sort(
+            [_sort_expr(df, s["column_id"]) for s in sort_by],
+            descending=[s["direction"] == "desc" for s in sort_by],
+            nulls_last=True,
+        )
 
-    return df.to_dict("records"), fig1, fig2, kpi_children
+    # Mantém a página dentro do intervalo quando os filtros encolhem o resultado
+    page_size = page_size or PAGE_SIZE
+    page_count = max(math.ceil(len(df) / page_size), 1)
+    page = min(page_current or 0, page_count - 1)
+    # Colunas ocultas pelo usuário não vão para o browser; só a página vira pandas
+    rows = df.slice(page * page_size, page_size).drop(hidden_columns or [], strict=False)
+    return _records(rows.to_pandas()), page_count, page
 
 # ========= Main =========
 if __name__ == "__main__":
+    _start_preload()
     app.run_server(host="0.0.0.0", port=int(os.getenv("PORT", "8050")), debug=False)
 
@@ -0,0 +1,39 @@
+import os
+import sys
+
+import pandas as pd
+
+os.environ.setdefault("RDSTATION_API_TOKEN", "test")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+
+def _frame(monkeypatch, **columns):
+    monkeypatch.setattr(app, "TIMEZONE", "America/Sao_Paulo")
+    monkeypatch.setattr(app, "fetch_all_deals", lambda: {**app._new_columns(), **columns})
+    return app._build_frame()
+
+
+def test_timestamps_keep_local_wall_time(monkeypatch):
+    df = _frame(
+        monkeypatch,
+        id=[1, 2, 3],
+        created_at=["2024-04-01T23:30-03:00", "2024-04-02T02:30:00.000Z", None],
+        closed_at=["2024-04-30T22:00:00-03:00", None, "invalido"],
+    )
+
+    assert pd.api.types.is_datetime64_dtype(df["created_at"])
+    assert df["created_at"].tolist()[:2] == [pd.Timestamp("2024-04-01 23:30")] * 2
+    assert df["created_at"].isna().tolist() == [False, False, True]
+    assert df["closed_at"].tolist()[0] == pd.Timestamp("2024-04-30 22:00")
+    assert df["closed_at"].isna().tolist() == [False, True, True]
+    # O deal das 23:30 de 01/04 fica no mês de abril
+    assert df["mes"].tolist()[:2] == [2024 * 12 + 3] * 2
+
+
+def test_date_only_prediction_date_is_not_shifted(monkeypatch):
+    df = _frame(monkeypatch, id=[1, 2], prediction_date=["2024-05-01", None])
+
+    assert df["prediction_date"].tolist()[0] == pd.Timestamp("2024-05-01")
+    assert df["prediction_date"].isna().tolist() == [False, True]
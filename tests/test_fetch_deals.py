@@ -0,0 +1,89 @@
+import asyncio
+import os
+import sys
+
+import httpx
+import orjson
+
+os.environ.setdefault("RDSTATION_API_TOKEN", "test")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+
+def _deal(i):
+    # Mapas e listas aninhados (inclusive com chaves "deals"/"item") não podem confundir o parser
+    return {
+        "id": f"d{i}",
+        "name": f"Deal {i}",
+        "amount_total": i * 1.5,
+        "deal_stage": {"id": f"s{i % 2}", "name": "Lead" if i % 2 else "Proposta", "meta": {"deals": [{"id": "x"}]}},
+        "contacts": [{"name": "c", "emails": [{"email": "a@b.c"}]}, {"item": {"id": "y"}}],
+        "status": None if i % 3 else "won",
+        "created_at": "2024-04-01T10:00:00-03:00",
+    }
+
+
+DEALS = [_deal(i) for i in range(23)]
+
+
+def _fetch(handler):
+    requests = []
+
+    async def chunks(body):
+        # Corpo em pedaços pequenos, com pedaços vazios no meio, como chega da rede
+        for i in range(0, len(body), 7):
+            yield body[i:i + 7]
+            yield b""
+
+    def record(request):
+        requests.append(request)
+        return httpx.Response(200, content=chunks(orjson.dumps(handler(request))))
+
+    columns = asyncio.run(app._afetch_all_deals(transport=httpx.MockTransport(record)))
+    return columns, requests
+
+
+def test_total_path_fetches_pages_in_parallel_with_capped_limit():
+    def handler(request):
+        # O servidor limita o limit a 10, qualquer que seja o pedido
+        page = int(request.url.params["page"])
+        limit = min(int(request.url.params["limit"]), 10)
+        return {"total": len(DEALS), "deals": DEALS[(page - 1) * limit:page * limit]}
+
+    columns, requests = _fetch(handler)
+
+    assert columns["id"] == [d["id"] for d in DEALS]
+    assert sorted(int(r.url.params["page"]) for r in requests) == [1, 2, 3]
+    assert {r.url.params["limit"] for r in requests[1:]} == {"10"}
+    assert all(r.headers["authorization"] == "Bearer test" for r in requests)
+
+
+def test_cursor_path_follows_next_page():
+    def handler(request):
+        start = int(request.url.params.get("next_page", "0"))
+        chunk = DEALS[start:start + 10]
+        return {"has_more": start + 10 < len(DEALS), "next_page": str(start + 10), "items": chunk}
+
+    columns, requests = _fetch(handler)
+
+    assert columns["id"] == [d["id"] for d in DEALS]
+    assert [r.url.params.get("next_page") for r in requests] == [None, "10", "20"]
+
+
+def test_nested_values_are_flattened_per_deal():
+    columns, _ = _fetch(lambda request: {"total": 2, "deals": DEALS[:2]})
+
+    assert columns["etapa"] == ["Proposta", "Lead"]
+    assert columns["valor"] == [0.0, 1.5]
+    assert columns["status"] == ["won", None]
+    assert columns["created_at"] == ["2024-04-01T10:00:00-03:00"] * 2
+    assert all(len(values) == 2 for values in columns.values())
+
+
+def test_top_level_list():
+    columns, requests = _fetch(lambda request: DEALS[:5])
+
+    assert columns["id"] == [d["id"] for d in DEALS[:5]]
+    assert columns["nome"] == [d["name"] for d in DEALS[:5]]
+    assert len(requests) == 1
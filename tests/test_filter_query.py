@@ -0,0 +1,67 @@
+import os
+import sys
+
+import pandas as pd
+import polars as pl
+import pytest
+
+os.environ.setdefault("RDSTATION_API_TOKEN", "test")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+
+@pytest.fixture
+def df():
+    frame = pd.DataFrame(
+        {
+            "nome": [f"Deal {i}" for i in range(45)],
+            "etapa": ["Lead" if i % 3 == 0 else "Proposta" for i in range(45)],
+            "valor": [float(i * 10) for i in range(45)],
+            "created_at": pd.to_datetime(["2023-12-15"] * 5 + ["2024-01-10T12:34:56"] * 40, format="ISO8601"),
+        }
+    )
+    frame["etapa"] = frame["etapa"].astype("category")
+    # Mesmo caminho do app: frame pandas salvo em parquet e lido pelo Polars
+    return pl.from_pandas(frame)
+
+
+def _apply_filter_query(df, query):
+    return df.filter(*app._filter_query_conditions(df, query))
+
+
+# filter_query como a DataTable envia (filter_options padrão: prefixo "s")
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("{nome} scontains 4", 9),
+        ("{valor} s> 150", 29),
+        ("{valor} s= 200", 1),
+        ("{valor} s>= 150 && {valor} s< 200", 5),
+        ("{etapa} scontains Lead", 15),
+        ("{etapa} s= Lead", 15),
+        ("{nome} icontains deal 1", 11),
+        ("{nome} scontains deal 1", 0),
+        ("{nome} i= DEAL 7", 1),
+        ("{created_at} datestartswith 2024", 40),
+        ('{created_at} datestartswith "2024"', 40),
+        ("{created_at} sdatestartswith 2023-12", 5),
+        ("{created_at} s>= 2024-01-01", 40),
+        ("{valor} ge 400", 5),
+        ("{valor} ne 0", 44),
+        ("{nome} contains 4", 9),
+    ],
+)
+def test_apply_filter_query(df, query, expected):
+    assert len(_apply_filter_query(df, query)) == expected
+
+
+def test_split_filter_part_keeps_raw_text_for_text_operators():
+    assert app._split_filter_part("{nome} scontains 4") == ("nome", "contains", False, "4")
+    assert app._split_filter_part("{valor} s> 150") == ("valor", ">", False, "150")
+    assert app._split_filter_part('{nome} icontains "Deal 4"') == ("nome", "contains", True, "Deal 4")
+    assert app._split_filter_part("{nome} is blank") == (None, None, False, None)
+
+
+def test_invalid_comparison_is_ignored(df):
+    assert len(_apply_filter_query(df, "{valor} s> abc")) == len(df)
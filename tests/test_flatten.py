@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("RDSTATION_API_TOKEN", "test")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+# Só roda com a extensão compilada (cythonize -i _flatten.pyx)
+_flatten = pytest.importorskip("_flatten")
+
+DEALS = [
+    {"id": 1, "name": "a", "deal_stage": {"name": "Lead"}, "amount_total": 10.5, "created_at": "2024-01-01"},
+    {"_id": "x", "stage": "Proposta", "amount": 0, "value": 3, "status": ""},
+    {"id": 2, "stage": {"name": None}, "deal_stage": {"name": "Fechamento"}, "status": False},
+    {"id": 3, "name": {"first": "b"}, "amount": [1, 2], "value": None, "stage": {"id": 7}},
+    {"id": None, "_id": 4, "closed_at": {"date": "2024-02-01"}, "prediction_date": "2024-03-01"},
+    {},
+]
+
+
+def test_extension_matches_pure_python():
+    expected, compiled = app._new_columns(), app._new_columns()
+    for deal in DEALS:
+        app._flatten_into_py(expected, deal, app.DEAL_FIELDS)
+        _flatten.flatten_into(compiled, deal, app.DEAL_FIELDS)
+    assert compiled == expected
+    assert expected["etapa"] == ["Lead", "Proposta", "Fechamento", None, None, None]